@@ -3,11 +3,20 @@ Ansible callback plugin for beautiful Laravel Artisan-style output
 """
 
 import os
+import re
 import time
 import sys
+import shutil
+import unicodedata
+from collections import namedtuple
 from datetime import datetime
 from ansible.plugins.callback import CallbackBase
 
+try:
+    from wcwidth import wcwidth
+except ImportError:
+    wcwidth = None
+
 # Simple ANSI color handling for all Ansible versions
 COLORS = {
     'green': '\033[0;32m',
@@ -21,10 +30,108 @@ COLORS = {
     'white': '\033[0;37m',
     'normal': '\033[0m'
 }
+RESET = COLORS['normal']
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+def _detect_ansible_version():
+    """Detect Ansible version for compatibility adjustments"""
+    try:
+        import ansible
+        version = ansible.__version__
+        # Parse major.minor version
+        version_parts = version.split('.')
+        major = int(version_parts[0])
+        minor = int(version_parts[1]) if len(version_parts) > 1 else 0
+        return version, major, minor
+    except:
+        # Fallback for unknown versions
+        return "unknown", 2, 9
+
+
+# Process-wide settings, resolved once at import
+_ANSIBLE_VERSION, _ANSIBLE_MAJOR, _ANSIBLE_MINOR = _detect_ansible_version()
+
+# Configuration options (can be set via environment variables)
+_SHOW_TIMESTAMPS = os.environ.get('ANSIBLE_PRETTIFY_SHOW_TIMESTAMPS', 'false').lower() == 'true'
+_SHOW_TIMING = os.environ.get('ANSIBLE_PRETTIFY_SHOW_TIMING', 'true').lower() == 'true'
+
 
 def color_text(text, color):
     """Apply ANSI color to text"""
-    return f"{COLORS.get(color, '')}{text}{COLORS['normal']}"
+    return f"{COLORS.get(color, '')}{text}{RESET}"
+
+
+def char_width(char):
+    """Terminal cell width of a single character"""
+    if wcwidth is not None:
+        width = wcwidth(char)
+        if width >= 0:
+            return width
+    # No wcwidth (or unprintable character) - wide East Asian characters
+    # take two cells and combining marks none
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in 'WF' else 1
+
+
+def visible_len(text):
+    """Terminal cell width of text, ignoring any ANSI color codes in it"""
+    if '\x1b' in text:
+        text = _ANSI_RE.sub('', text)
+    # ASCII is one cell per character
+    if text.isascii():
+        return len(text)
+    return sum(char_width(c) for c in text)
+
+
+def cell_index(text, cells):
+    """Index where text must be cut so the part before it fits in cells"""
+    cells = max(cells, 0)
+    if text.isascii() and '\x1b' not in text:
+        return min(len(text), cells)
+    width = 0
+    i = 0
+    while i < len(text):
+        # Color codes take no space and are never split
+        match = _ANSI_RE.match(text, i) if text[i] == '\x1b' else None
+        if match:
+            i = match.end()
+            continue
+        width += char_width(text[i])
+        if width > cells:
+            break
+        i += 1
+    return i
+
+
+def build_color_codes(colors):
+    """Map each color role (success, dots, ...) to its raw escape code"""
+    return {name: COLORS.get(color, '') for name, color in colors.items()}
+
+
+# A single-line result is head + name + sep + dots + mid + timing + tail
+LineParts = namedtuple('LineParts', 'head sep mid tail')
+
+
+def build_line_parts(codes, symbols, status_text):
+    """Build the static LineParts of a single-line result for each status
+
+    Escape codes are only emitted where the color changes, as in _compose.
+    """
+    def switch(current, new):
+        return new if new != current else ''
+
+    name, dots, timing = codes['task_name'], codes['dots'], codes['timing']
+    parts = {}
+    for status, text in status_text.items():
+        color = codes[status]
+        parts[status] = LineParts(
+            head="  " + switch(RESET, color) + symbols[status] + " " + switch(color, name),
+            sep=" " + switch(name, dots),
+            mid=switch(dots, timing),
+            tail=" " + switch(timing, color) + text + switch(color, RESET),
+        )
+    return parts
 
 
 class CallbackModule(CallbackBase):
@@ -44,76 +151,125 @@ class CallbackModule(CallbackBase):
     LONGEST_STATUS = 7          # "SKIPPED" or "CHANGED"
     PREFIX_SPACE = 6            # "  ✓ " + " "
     MIN_DOTS = 3
+    BREAK_CHARS = (' ', '_', '-', ':')  # No '.' or '/' to avoid bad path breaks
+    MAX_DOT_CACHE = 64          # Distinct dot-fill lengths kept around
+    MAX_ROLE_CACHE = 256        # Task role names kept around
+
+    # Colors and symbols, shared by all instances. _color_codes and _line_parts
+    # are derived from them when the class is created (and rebuilt for each
+    # subclass), so override them in a subclass - never mutate them in place
+    # or assign them per instance, or result lines keep the old colors.
+    colors = {
+        'success': 'green',
+        'failed': 'red',
+        'changed': 'yellow',
+        'skipped': 'cyan',
+        'unreachable': 'bright_red',
+        'info': 'blue',
+        'header': 'purple',
+        'task_name': 'normal',  # Default terminal color
+        'dots': 'gray',
+        'timing': 'gray',
+    }
+
+    symbols = {
+        'success': '✓',
+        'failed': '✗',
+        'changed': '~',
+        'skipped': '→',
+        'unreachable': '⚠',
+        'running': '●',
+    }
+
+    # Raw escape codes, reused for every result
+    _color_codes = build_color_codes(colors)
+
+    # Status labels, right-padded to LONGEST_STATUS (UNREACHABLE overflows it)
+    _STATUS_TEXT = {
+        'success': 'DONE   ',
+        'changed': 'CHANGED',
+        'failed': 'FAILED ',
+        'skipped': 'SKIPPED',
+        'unreachable': 'UNREACHABLE',
+    }
+
+    # Playbook summary rows: (stats key, symbol, label, color)
+    _SUMMARY_ITEMS = (
+        ('ok', '✓', 'successful', 'success'),
+        ('changed', '~', 'changed', 'changed'),
+        ('failures', '✗', 'failed', 'failed'),
+        ('unreachable', '⚠', 'unreachable', 'unreachable'),
+        ('skipped', '→', 'skipped', 'skipped'),
+    )
+
+    # Static pieces of a single-line result per status
+    _line_parts = build_line_parts(_color_codes, symbols, _STATUS_TEXT)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Derive the escape code tables from the subclass's own colors and symbols
+        cls._color_codes = build_color_codes(cls.colors)
+        cls._line_parts = build_line_parts(cls._color_codes, cls.symbols, cls._STATUS_TEXT)
 
     def __init__(self):
         super(CallbackModule, self).__init__()
         self.start_time = time.time()
         self.task_start_time = None
+        self._now = time.monotonic  # Task durations only, not wall-clock time
         self.play_start_time = None
         self.last_task = None
         self.last_role = None
+        self._last_role_obj = None
+        self.playbook_name = None
         self.cached_terminal_width = None
+        self._dot_cache = {}
+        self._role_cache = {}
+
+        # Ansible version for compatibility
+        self.ansible_version = _ANSIBLE_VERSION
+        self.ansible_major = _ANSIBLE_MAJOR
+        self.ansible_minor = _ANSIBLE_MINOR
 
-        # Detect Ansible version for compatibility
-        self._detect_ansible_version()
-
-        # Configuration options (can be set via environment variables)
-        self.show_timestamps = os.environ.get('ANSIBLE_PRETTIFY_SHOW_TIMESTAMPS', 'false').lower() == 'true'
-        self.show_timing = os.environ.get('ANSIBLE_PRETTIFY_SHOW_TIMING', 'true').lower() == 'true'
-
-        # Colors and symbols
-        self.colors = {
-            'success': 'green',
-            'failed': 'red',
-            'changed': 'yellow',
-            'skipped': 'cyan',
-            'unreachable': 'bright_red',
-            'info': 'blue',
-            'header': 'purple',
-            'task_name': 'normal',  # Default terminal color
-            'dots': 'gray',
-            'timing': 'gray',
-        }
-
-        self.symbols = {
-            'success': '✓',
-            'failed': '✗',
-            'changed': '~',
-            'skipped': '→',
-            'unreachable': '⚠',
-            'running': '●',
-        }
+        # Configuration options
+        self.show_timestamps = _SHOW_TIMESTAMPS
+        self.show_timing = _SHOW_TIMING
 
     def _colorize(self, msg, color):
         """Apply color to message"""
         return color_text(msg, color)
 
-    def _detect_ansible_version(self):
-        """Detect Ansible version for compatibility adjustments"""
-        try:
-            import ansible
-            self.ansible_version = ansible.__version__
-            # Parse major.minor version
-            version_parts = self.ansible_version.split('.')
-            self.ansible_major = int(version_parts[0])
-            self.ansible_minor = int(version_parts[1]) if len(version_parts) > 1 else 0
-        except:
-            # Fallback for unknown versions
-            self.ansible_version = "unknown"
-            self.ansible_major = 2
-            self.ansible_minor = 9
+    def _compose(self, parts):
+        """Join (text, color) parts, emitting an escape code only when the color changes"""
+        codes = self._color_codes
+        current = RESET
+        out = []
+        for text, color in parts:
+            # A color of None keeps the current one (used for separators)
+            if color is not None and codes[color] != current:
+                current = codes[color]
+                out.append(current)
+            out.append(text)
+        if current != RESET:
+            out.append(RESET)
+        return "".join(out)
 
     def _get_terminal_width(self):
         """Get terminal width with caching and minimum width enforcement"""
         if self.cached_terminal_width is None:
-            try:
-                import shutil
-                width = shutil.get_terminal_size().columns
-                self.cached_terminal_width = max(width, self.MIN_TERMINAL_WIDTH)
-            except:
-                self.cached_terminal_width = 80  # Fallback
+            width = shutil.get_terminal_size((80, 24)).columns
+            self.cached_terminal_width = max(width, self.MIN_TERMINAL_WIDTH)
         return self.cached_terminal_width
 
+    def _get_dots(self, dots_needed):
+        """Get a dot-fill string of at least MIN_DOTS, cached by length"""
+        n = max(dots_needed, self.MIN_DOTS)
+        dots = self._dot_cache.get(n)
+        if dots is None:
+            if len(self._dot_cache) >= self.MAX_DOT_CACHE:
+                self._dot_cache.clear()
+            dots = self._dot_cache[n] = "." * n
+        return dots
+
     def _print_header(self, msg, color=None):
         """Print a header message"""
         if color is None:
@@ -131,24 +287,43 @@ class CallbackModule(CallbackBase):
         pass
 
     def _get_task_role(self, task):
+        """Get role name for task, memoized by task uuid"""
+        # Results carry per-host copies of the task; the uuid survives copying
+        uuid = getattr(task, '_uuid', None)
+        if uuid is None:
+            return self._find_task_role(task)
+        role_name = self._role_cache.get(uuid)
+        if role_name is None:
+            if len(self._role_cache) >= self.MAX_ROLE_CACHE:
+                self._role_cache.clear()
+            role_name = self._role_cache[uuid] = self._find_task_role(task)
+        return role_name
+
+    def _find_task_role(self, task):
         """Extract role name from task using multiple fallback methods"""
-        # List of attribute paths to try for role objects and their name methods
-        role_paths = [
-            ('_role', ['_role_name', 'get_name']),
-            ('role', ['_role_name', 'get_name']),
-        ]
-
-        # Try direct role attribute access
-        for attr, name_methods in role_paths:
-            role_obj = getattr(task, attr, None)
-            if role_obj:
-                for name_method in name_methods:
-                    if hasattr(role_obj, name_method):
-                        role_name = getattr(role_obj, name_method)
-                        if callable(role_name):
-                            role_name = role_name()
-                        if role_name:
-                            return role_name
+        # Fast path: tasks inside a role carry task._role._role_name
+        try:
+            role_name = task._role._role_name
+            if role_name:
+                return role_name
+        except AttributeError:
+            pass
+
+        try:
+            role_name = task.role._role_name
+            if role_name:
+                return role_name
+        except AttributeError:
+            pass
+
+        # Fall back to the role's public accessor
+        for role_obj in (getattr(task, '_role', None), getattr(task, 'role', None)):
+            try:
+                role_name = role_obj.get_name()
+                if role_name:
+                    return role_name
+            except AttributeError:
+                pass
 
         # Try parent task for included/imported tasks
         parent = getattr(task, '_parent', None)
@@ -165,48 +340,102 @@ class CallbackModule(CallbackBase):
                 task_path = task.get_path()
                 if task_path and '/roles/' in task_path:
                     # Extract role name from path like /path/to/roles/role-name/tasks/main.yml
-                    return task_path.split('/roles/')[1].split('/')[0]
-            except (AttributeError, IndexError):
+                    return task_path.partition('/roles/')[2].partition('/')[0]
+            except AttributeError:
                 pass
 
         return ""
 
+    def _suffix_len(self, status, timing_info):
+        """Visible width of the timing and status that follow the dots"""
+        return len(timing_info) + 1 + len(self._STATUS_TEXT[status])
+
+    def _build_suffix(self, status, prefix_len, timing_info, max_width):
+        """Build the right-aligned rest of a result line after the task name
+
+        prefix_len is the visible width of everything up to and including the name.
+        """
+        parts = self._line_parts[status]
+        # " " + dots + timing + " " + status
+        dots = self._get_dots(max_width - prefix_len - 1 - self._suffix_len(status, timing_info))
+        return "".join((parts.sep, dots, parts.mid, timing_info, parts.tail))
+
+    def _wrap_lines(self, display_name, status, timing_info, max_width, max_task_width):
+        """Lay out a too-long task result as two lines split at a word boundary
+
+        Returns None if there is no good break point.
+        """
+        # Need to wrap - find good break point
+        # Prefer spaces, avoid breaking paths poorly
+        best_break = -1
+
+        # Look for break point - search from ideal length backwards, measured
+        # in terminal cells and converted to character indices
+        search_start = min(cell_index(display_name, max_task_width - 3), len(display_name) - 1)
+        search_end = cell_index(display_name, max(25, max_task_width // 2))  # Avoid very short first lines
+
+        # Candidates lie in (search_end, search_start]; rfind scans each char in C
+        lo, hi = search_end + 1, search_start + 1
+        while True:
+            i = max(display_name.rfind(c, lo, hi) for c in self.BREAK_CHARS)
+            if i < 0:
+                break
+            # Don't break right after a short word (less than 3 chars)
+            if i > 3 and display_name[i-3:i].strip():
+                best_break = i
+                break
+            hi = i
+
+        if best_break <= 0:
+            return None
+
+        # Split at word boundary
+        first_part = display_name[:best_break].rstrip()
+        second_part = display_name[best_break:].lstrip()
+
+        # First line - no dots, no timing, no status - just task name
+        first_line = self._compose([
+            ("  ", None), (self.symbols[status], status), (" ", None), (first_part, 'task_name'),
+        ])
+
+        # Second line with timing and status - right aligned
+        second_prefix = "    "  # 4 spaces for continuation
+        prefix_len = len(second_prefix) + visible_len(second_part)
+        second_line = self._compose([(second_prefix, None), (second_part, 'task_name')])
+        return [first_line, second_line + self._build_suffix(status, prefix_len, timing_info, max_width)]
+
     def _print_result(self, result, status):
         """Print task result with timing"""
-        symbol = self.symbols.get(status, self.symbols['success'])
-        status_color = self.colors.get(status, self.colors['success'])
+        display = self._display.display
+        # Collect all lines for this result and write them in one call
+        out = []
+        if status not in self._STATUS_TEXT:
+            status = 'success'
 
         # Build result line like Laravel Artisan
         task_name = result._task.name
         if not task_name or not task_name.strip():
             task_name = f"[{result._task.action}]"
 
-        # Check if we need to show a role header
-        current_role = self._get_task_role(result._task)
-        if current_role and current_role != getattr(self, 'last_role', None):
-            # Show role header
-            self._display.display("")
-            role_header = f"┌─ {current_role}"
-            self._display.display(self._colorize(role_header, self.colors['info']))
-            self.last_role = current_role
+        # Check if we need to show a role header - tasks sharing the last
+        # role object can't change the role, so skip resolving it for them
+        role_obj = getattr(result._task, '_role', None)
+        if role_obj is None or role_obj is not self._last_role_obj:
+            current_role = self._get_task_role(result._task)
+            if current_role and current_role != self.last_role:
+                # Show role header
+                role_header = f"┌─ {current_role}"
+                out.append("")
+                out.append(f"{self._color_codes['info']}{role_header}{RESET}")
+                self.last_role = current_role
+            self._last_role_obj = role_obj
 
         display_name = task_name
 
-        # Add timing if enabled
+        # Add timing if enabled (start time is only recorded when it is)
         timing_info = ""
-        if self.show_timing and self.task_start_time:
-            duration = time.time() - self.task_start_time
-            timing_info = f"{duration * 1000:.0f}ms"
-
-        status_text = {
-            'changed': 'CHANGED',
-            'failed': 'FAILED',
-            'skipped': 'SKIPPED',
-            'unreachable': 'UNREACHABLE'
-        }.get(status, 'DONE')
-
-        # Right-pad status text to make all statuses the same width
-        status_text = status_text.ljust(self.LONGEST_STATUS)
+        if self.task_start_time is not None:
+            timing_info = f"{int((self._now() - self.task_start_time) * 1000)}ms"
 
         # Dynamic layout based on terminal width
         # Layout: "  ✓ Task name ................................. 123ms DONE"
@@ -220,85 +449,36 @@ class CallbackModule(CallbackBase):
         # Maximum space for task name and dots
         max_task_width = max_width - self.PREFIX_SPACE - reserved_space
 
-        if len(display_name) > max_task_width:
-            # Need to wrap - find good break point
-            # Prefer spaces, avoid breaking paths poorly
-            break_chars = [' ', '_', '-', ':']  # Removed '.' and '/' to avoid bad path breaks
-            best_break = -1
-
-            # Look for break point - search from ideal length backwards
-            search_start = min(max_task_width - 3, len(display_name) - 1)
-            search_end = max(25, max_task_width // 2)  # Increased minimum to avoid very short first lines
-
-            for i in range(search_start, search_end, -1):
-                if i < len(display_name) and display_name[i] in break_chars:
-                    # Don't break right after a short word (less than 3 chars)
-                    if i > 3 and display_name[i-3:i].strip():
-                        best_break = i
-                        break
-
-            if best_break > 0:
-                # Split at word boundary
-                first_part = display_name[:best_break].rstrip()
-                second_part = display_name[best_break:].lstrip()
-
-                # First line - no dots, no timing, no status - just task name
-                first_line = f"  {color_text(symbol, status_color)} {color_text(first_part, self.colors['task_name'])}"
-                self._display.display(first_line)
-
-                # Second line with timing and status - right aligned
-                second_prefix = "    "  # 4 spaces for continuation
-                second_line_prefix = f"{second_prefix}{color_text(second_part, self.colors['task_name'])} "
-
-                # Calculate suffix for second line
-                suffix_parts = []
-                if timing_info:
-                    suffix_parts.append(color_text(timing_info, self.colors['timing']))
-                suffix_parts.append(" " + color_text(status_text, status_color))
-                suffix = "".join(suffix_parts)
-
-                # Calculate dots for second line
-                prefix_len = len(f"{second_prefix}{second_part} ")  # Without color codes
-                suffix_len = len(f"{timing_info} {status_text}")  # Without color codes
-                dots_needed = max_width - prefix_len - suffix_len
-                dots = "." * max(dots_needed, self.MIN_DOTS)
-
-                # Build second line
-                second_line = f"{second_line_prefix}{color_text(dots, self.colors['dots'])}{suffix}"
-                self._display.display(second_line)
+        name_width = visible_len(display_name)
+        if name_width > max_task_width:
+            wrapped = self._wrap_lines(display_name, status, timing_info, max_width, max_task_width)
+            if wrapped:
+                out.extend(wrapped)
+                display("\n".join(out))
                 return
-            else:
-                # No good break point - truncate
-                display_name = display_name[:max_task_width-3] + "..."
+            # No good break point - truncate
+            display_name = display_name[:cell_index(display_name, max_task_width - 3)] + "..."
+            name_width = visible_len(display_name)
 
         # Normal single line case - build from scratch with right alignment
-        prefix = f"  {color_text(symbol, status_color)} {color_text(display_name, self.colors['task_name'])} "
-
-        # Calculate how much space we need for the suffix
-        suffix_parts = []
-        if timing_info:
-            suffix_parts.append(color_text(timing_info, self.colors['timing']))
-        suffix_parts.append(" " + color_text(status_text, status_color))
-        suffix = "".join(suffix_parts)
-
-        # Calculate dots needed to fill the space
-        prefix_len = len(f"  {symbol} {display_name} ")  # Without color codes
-        suffix_len = len(f"{timing_info} {status_text}")  # Without color codes
-        dots_needed = max_width - prefix_len - suffix_len
-        dots = "." * max(dots_needed, self.MIN_DOTS)
-
-        # Build the complete line
-        line = f"{prefix}{color_text(dots, self.colors['dots'])}{suffix}"
-        self._display.display(line)
+        prefix_len = name_width + 4  # "  ✓ " + name, symbol is one cell wide
+        suffix = self._build_suffix(status, prefix_len, timing_info, max_width)
+        out.append("".join((self._line_parts[status].head, display_name, suffix)))
 
         # Show failure details
         if status == 'failed' and 'msg' in result._result:
             error_msg = f"    Error: {result._result['msg']}"
-            self._display.display(self._colorize(error_msg, self.colors['failed']))
+            out.append(f"{self._color_codes['failed']}{error_msg}{RESET}")
+
+        display("\n".join(out))
 
     def v2_playbook_on_start(self, playbook):
         """Called when the playbook starts"""
         self.start_time = time.time()
+        # Remember the playbook file for the completion message
+        file_name = getattr(playbook, '_file_name', None)
+        if file_name:
+            self.playbook_name = file_name.lower()
         # Don't print "Starting Ansible Playbook" - too verbose
 
     def v2_playbook_on_play_start(self, play):
@@ -318,7 +498,8 @@ class CallbackModule(CallbackBase):
 
     def v2_playbook_on_task_start(self, task, is_conditional):
         """Called when a task starts"""
-        self.task_start_time = time.time()
+        if self.show_timing:
+            self.task_start_time = self._now()
         self.last_task = task
         # Don't print task start banners - cleaner output
 
@@ -345,46 +526,28 @@ class CallbackModule(CallbackBase):
         """Called when the playbook finishes"""
         total_time = time.time() - self.start_time
 
-        self._display.display("")
-
         # Show host stats in clean format like Laravel Artisan
         hosts = sorted(stats.processed.keys())
 
-        # Create a clean summary table
+        # Create a clean summary table, written in one call
+        lines = [""]
         for host in hosts:
             summary = stats.summarize(host)
 
-            # Build status parts with symbols and consistent spacing
-            status_parts = []
-            if summary['ok'] > 0:
-                status_parts.append(self._colorize(f"✓ {summary['ok']} successful", self.colors['success']))
-            if summary['changed'] > 0:
-                status_parts.append(self._colorize(f"~ {summary['changed']} changed", self.colors['changed']))
-            if summary['failures'] > 0:
-                status_parts.append(self._colorize(f"✗ {summary['failures']} failed", self.colors['failed']))
-            if summary['unreachable'] > 0:
-                status_parts.append(self._colorize(f"⚠ {summary['unreachable']} unreachable", self.colors['unreachable']))
-            if summary['skipped'] > 0:
-                status_parts.append(self._colorize(f"→ {summary['skipped']} skipped", self.colors['skipped']))
-
-            # Format the host summary nicely
-            host_header = self._colorize(f"  {host}", self.colors['info'])
-            self._display.display(host_header)
-            for status_part in status_parts:
-                self._display.display(f"    {status_part}")
+            # Format the host summary nicely, one line per non-zero count
+            lines.append(self._compose([("  ", None), (host, 'info')]))
+            lines.extend(
+                self._compose([("    ", None), (f"{symbol} {summary[key]} {label}", color)])
+                for key, symbol, label, color in self._SUMMARY_ITEMS
+                if summary[key] > 0
+            )
+        self._display.display("\n".join(lines))
 
         # Determine if this is a deployment or provision based on playbook name
-        playbook_name = ""
-        try:
-            # Try to get the playbook name from the environment or context
-            import sys
-            if len(sys.argv) > 0:
-                for arg in sys.argv:
-                    if arg.endswith('.yml') or arg.endswith('.yaml'):
-                        playbook_name = arg.lower()
-                        break
-        except:
-            pass
+        playbook_name = self.playbook_name
+        if playbook_name is None:
+            # Playbook file unknown - fall back to the command line
+            playbook_name = next((arg.lower() for arg in sys.argv if arg.endswith(('.yml', '.yaml'))), "")
 
         # Show context-aware completion message
         self._display.display("")